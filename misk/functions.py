@@ -4,21 +4,36 @@
 # See https://github.com/marzer/misk/blob/master/LICENSE.txt for the full license text.
 # SPDX-License-Identifier: MIT
 
+import collections
+import collections.abc
+import concurrent.futures
+import errno
 import fnmatch
+import functools
 import hashlib
 import io
 import logging
+import mmap
+import os
 import pathlib
 import re
 import shutil
+import stat
 import subprocess
 import sys
 import textwrap
 import traceback
+import uuid
 from pathlib import Path
-from typing import List, Union
+from typing import Collection, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+	from blake3 import blake3 as _blake3
+except ImportError:
+	_blake3 = None
 
 __all__ = [
 	r'is_collection',
@@ -33,15 +48,21 @@ __all__ = [
 	r'move_file',
 	r'delete_file',
 	r'enumerate_files',
+	r'enumerate_files_with_stat',
 	r'get_all_files',
 	r'enumerate_directories',
 	r'read_all_text_from_file',
 	r'run_python_script',
 	r'sha1',
 	r'sha256',
+	r'blake2b',
+	r'blake3',
+	r'sha1_file',
+	r'sha256_file',
 	r'is_pow2',
 	r'next_pow2',
 	r'replace_metavar',
+	r'replace_metavars',
 	r'tabify',
 	r'untabify',
 	r'reindent',
@@ -58,11 +79,16 @@ __all__ = [
 
 
 
+_PYTHON = sys.executable or ('py' if shutil.which('py') is not None else 'python3')
+_ENTRY_DIR = Path(sys.argv[0]).resolve().parent
+
+
+
 class _State(object):
 
 	def __init__(self):
-		self.entry_script_dir = Path(sys.argv[0]).resolve().parent
-		self.python = 'py' if shutil.which('py') is not None else 'python3'
+		self.entry_script_dir = _ENTRY_DIR
+		self.python = _PYTHON
 
 
 
@@ -78,6 +104,21 @@ def _state() -> _State:
 
 
 
+__session = None
+
+
+
+def _session() -> requests.Session:
+	global __session
+	if __session is None:
+		__session = requests.Session()
+		adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+		__session.mount('https://', adapter)
+		__session.mount('http://', adapter)
+	return __session
+
+
+
 #=======================================================================================================================
 # functions
 #=======================================================================================================================
@@ -99,17 +140,22 @@ def _log(logger, msg, level=logging.INFO):
 
 
 
+_COLLECTION_TYPES = frozenset((list, tuple, dict, set, frozenset, range))
+
+
+
 def is_collection(val) -> bool:
 	'''
-	Returns true if an object is an instance of one of the python built-in iterable collections.
+	Returns true if an object is a collection (e.g. list, tuple, dict, set). Strings and bytes are not considered
+	collections.
 	'''
-	if isinstance(val, (list, tuple, dict, set, range)):
+	if type(val) in _COLLECTION_TYPES:
 		return True
-	return False
+	return isinstance(val, collections.abc.Collection) and not isinstance(val, (str, bytes, bytearray, memoryview))
 
 
 
-def coerce_collection(val) -> Union[list, tuple, dict, set, range]:
+def coerce_collection(val) -> Collection:
 	'''
 	Returns the input if it already satisfies is_collection(), otherwise returns the input boxed into a tuple.
 	'''
@@ -127,18 +173,18 @@ def print_exception(exc, logger=sys.stderr, include_type=False, include_tracebac
 	if isinstance(exc, (AssertionError, NameError, TypeError)):
 		include_type = True
 		include_traceback = True
-	with io.StringIO() as buf:
-		if include_traceback:
-			tb = exc.__traceback__
-			while skip_frames > 0 and tb.tb_next is not None:
-				skip_frames = skip_frames - 1
-				tb = tb.tb_next
-			traceback.print_exception(type(exc), exc, tb, file=buf)
+	if not include_traceback:
+		if include_type:
+			_log(logger, rf'Error: [{type(exc).__name__}] {exc}', level=logging.ERROR)
 		else:
-			print(rf'Error: ', file=buf, end='')
-			if include_type:
-				print(rf'[{type(exc).__name__}] ', file=buf, end='')
-			print(str(exc), file=buf, end='')
+			_log(logger, rf'Error: {exc}', level=logging.ERROR)
+		return
+	with io.StringIO() as buf:
+		tb = exc.__traceback__
+		while skip_frames > 0 and tb.tb_next is not None:
+			skip_frames = skip_frames - 1
+			tb = tb.tb_next
+		traceback.print_exception(type(exc), exc, tb, file=buf)
 		_log(logger, buf.getvalue(), level=logging.ERROR)
 
 
@@ -147,7 +193,19 @@ def entry_script_dir() -> pathlib.Path:
 	'''
 	Returns a pathlib.Path representing the directory of the script used to enter the python process.
 	'''
-	return _state().entry_script_dir
+	return _ENTRY_DIR
+
+
+
+_PATH_TYPE = type(Path())
+
+
+
+def _path_part(arg):
+	# str and os.PathLike are both accepted by Path() as-is (via os.fspath())
+	if isinstance(arg, (str, os.PathLike)):
+		return arg
+	return str(arg)
 
 
 
@@ -156,12 +214,45 @@ def coerce_path(arg, *args) -> pathlib.Path:
 	Buildes path from one or more inputs.
 	'''
 	assert arg is not None
-	if args is not None and len(args):
-		return Path(str(arg), *[str(a) for a in args])
-	else:
-		if not isinstance(arg, Path):
-			arg = Path(str(arg))
-		return arg
+	if not args:
+		# exact type check first; Path() actually instantiates PosixPath or WindowsPath
+		if type(arg) is _PATH_TYPE or isinstance(arg, Path):
+			return arg
+		return Path(_path_part(arg))
+	return Path(_path_part(arg), *(_path_part(a) for a in args))
+
+
+
+def _coerce_path_str(arg) -> str:
+	# for callers that only hand the path on to os/shutil; still normalised by Path (e.g. trailing separators
+	# dropped) so these helpers accept exactly the same inputs as coerce_path()
+	return str(coerce_path(arg))
+
+
+
+# the same errors pathlib's exists()/is_file()/is_dir() treat as 'does not exist'
+_STAT_IGNORED_ERRNOS = (errno.ENOENT, errno.ENOTDIR, errno.EBADF, errno.ELOOP)
+_STAT_IGNORED_WINERRORS = (21, 123, 1921)  # ERROR_NOT_READY, ERROR_INVALID_NAME, ERROR_CANT_RESOLVE_FILENAME
+
+
+
+def _stat(path) -> Optional[os.stat_result]:
+	# a single stat() in place of separate exists() + is_file()/is_dir() calls
+	try:
+		return os.stat(path)
+	except OSError as e:
+		if e.errno in _STAT_IGNORED_ERRNOS or getattr(e, 'winerror', None) in _STAT_IGNORED_WINERRORS:
+			return None
+		raise
+	except ValueError:  # e.g. embedded null character
+		return None
+
+
+
+def _assert_existing_file(path):
+	st = _stat(path)
+	if st is None or not stat.S_ISREG(st.st_mode):
+		raise Exception(rf'{path} did not exist or was not a file')
 
 
 
@@ -169,9 +260,7 @@ def assert_existing_file(path):
 	'''
 	Asserts that a path represents an existing file on disk.
 	'''
-	path = coerce_path(path)
-	if not path.exists() or not path.is_file():
-		raise Exception(rf'{path} did not exist or was not a file')
+	_assert_existing_file(coerce_path(path))
 
 
 
@@ -180,7 +269,8 @@ def assert_existing_directory(path):
 	Asserts that a path represents an existing directory on disk.
 	'''
 	path = coerce_path(path)
-	if not path.exists() or not path.is_dir():
+	st = _stat(path)
+	if st is None or not stat.S_ISDIR(st.st_mode):
 		raise Exception(f'{path} did not exist or was not a directory')
 
 
@@ -189,12 +279,17 @@ def delete_directory(path, logger=None):
 	'''
 	Deletes a directory (and all its contents).
 	'''
-	path = coerce_path(path)
-	if path.exists():
-		if not path.is_dir():
+	path = _coerce_path_str(path)
+	st = _stat(path)
+	if st is not None:
+		if not stat.S_ISDIR(st.st_mode):
 			raise Exception(rf'{path} was not a directory')
 		_log(logger, rf'Deleting {path}')
-		shutil.rmtree(str(path.resolve()))
+		# rmtree() refuses symlinks and can't remove the final '..' of a path, so those are resolved first
+		# (deleting the real directory, as the old unconditional resolve() did); simple paths skip the realpath walk
+		if os.path.islink(path) or os.pardir in Path(path).parts:
+			path = os.path.realpath(path)
+		shutil.rmtree(path)
 
 
 
@@ -202,13 +297,11 @@ def copy_file(source, dest, logger=None):
 	'''
 	Copies a single file.
 	'''
-	source = coerce_path(source)
-	dest = coerce_path(dest)
-	assert_existing_file(source)
+	source = _coerce_path_str(source)
+	dest = _coerce_path_str(dest)
+	_assert_existing_file(source)
 	_log(logger, rf'Copying {source} to {dest}')
-	shutil.copy(str(source), str(dest), follow_symlinks=True)
-	if (source.is_file() and dest.is_file()):
-		shutil.copymode(str(source), str(dest), follow_symlinks=True)
+	shutil.copy(source, dest, follow_symlinks=True)  # also copies permission bits
 
 
 
@@ -216,11 +309,11 @@ def move_file(source, dest, logger=None):
 	'''
 	Moves a single file.
 	'''
-	source = coerce_path(source)
-	dest = coerce_path(dest)
-	assert_existing_file(source)
+	source = _coerce_path_str(source)
+	dest = _coerce_path_str(dest)
+	_assert_existing_file(source)
 	_log(logger, rf'Moving {source} to {dest}')
-	shutil.move(str(source), str(dest))
+	shutil.move(source, dest)
 
 
 
@@ -228,70 +321,173 @@ def delete_file(path, logger=None):
 	'''
 	Deletes a single file.
 	'''
-	path = coerce_path(path)
-	if path.exists():
-		if not path.is_file():
+	path = _coerce_path_str(path)
+	st = _stat(path)
+	if st is not None:
+		if not stat.S_ISREG(st.st_mode):
 			raise Exception(rf'{path} was not a file')
 		_log(logger, rf'Deleting {path}')
-		path.unlink()
+		os.unlink(path)
 
 
 
-def enumerate_files(root, all=None, any=None, none=None, recursive=False, sort=True) -> List[pathlib.Path]:
-	'''
-	Collects all files in a directory matching some filename filters.
-	'''
+def _coerce_file_name_filters(filters) -> list:
+	if filters is None:
+		return []
+	return [f for f in coerce_collection(filters) if f is not None]
+
+
+
+@functools.lru_cache(maxsize=256)
+def _translate_file_name_filter(filter: str) -> str:
+	# expects an already normcase()'d filter
+	return fnmatch.translate(filter)
+
+
+
+def _compile_file_name_filters(filters) -> list:
+	return [re.compile(_translate_file_name_filter(os.path.normcase(f))) for f in filters]
+
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_file_name_filter_union_cached(filters: tuple):
+	return re.compile('|'.join([rf'(?:{_translate_file_name_filter(f)})' for f in filters]))
+
+
+
+def _compile_file_name_filter_union(filters):
+	# a single regex matching any of the filters, so each name is only tested once.
+	# duplicates must be removed: on python 3.9 and 3.10 translate() emits named groups, so the same
+	# (cached) translation appearing twice in the union would be a regex error.
+	if not filters:
+		return None
+	return _compile_file_name_filter_union_cached(tuple(dict.fromkeys([os.path.normcase(f) for f in filters])))
+
+
+
+def _file_name_matches(name, match_all, match_any, match_none) -> bool:
+	name = os.path.normcase(name)
+	for pattern in match_all:
+		if not pattern.match(name):
+			return False
+	if match_any is not None and not match_any.match(name):
+		return False
+	if match_none is not None and match_none.match(name):
+		return False
+	return True
+
+
+
+def _walk_files(root: str, match_all, match_any, match_none, recursive):
+	# iterative walk using os.scandir(), since DirEntry gets the file type from the directory listing
+	# (no additional stat() per entry, unlike Path.is_dir() and friends)
+	dirs = collections.deque((root, ))
+	while dirs:
+		with os.scandir(dirs.popleft()) as it:
+			for entry in it:
+				if entry.is_dir():
+					if recursive:
+						dirs.append(entry.path)
+				elif entry.is_file() and _file_name_matches(entry.name, match_all, match_any, match_none):
+					yield entry
+
+
+
+def _scan_directory(dir: str, match_all, match_any, match_none):
+	subdirs = []
+	files = []
+	with os.scandir(dir) as it:
+		for entry in it:
+			if entry.is_dir():
+				subdirs.append(entry.path)
+			elif entry.is_file() and _file_name_matches(entry.name, match_all, match_any, match_none):
+				files.append(entry)
+	return subdirs, files
+
+
+
+def _walk_files_parallel(root: str, match_all, match_any, match_none, workers):
+	# scan the root on the calling thread first so trivial trees don't pay for the thread pool
+	subdirs, files = _scan_directory(root, match_all, match_any, match_none)
+	yield from files
+	if not subdirs:
+		return
+
+	# os.scandir() releases the GIL while reading directories, so independent subtrees can be read concurrently
+	with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+		pending = {executor.submit(_scan_directory, d, match_all, match_any, match_none) for d in subdirs}
+		while pending:
+			done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+			for future in done:
+				subdirs, files = future.result()
+				for d in subdirs:
+					pending.add(executor.submit(_scan_directory, d, match_all, match_any, match_none))
+				yield from files
+
+
+
+def _enumerate_file_entries(root, all, any, none, recursive, workers):
 	root = coerce_path(root)
-	if not root.exists():
+	st = _stat(root)
+	if st is None:
 		return []
-	if not root.is_dir():
+	if not stat.S_ISDIR(st.st_mode):
 		raise Exception(rf'{root} was not a directory')
 
-	child_files = []
-	files = []
-	for p in root.iterdir():
-		if p.is_dir():
-			if recursive:
-				child_files = child_files + enumerate_files(p, all=all, any=any, none=none, recursive=True, sort=False)
-		elif p.is_file():
-			files.append(str(p.name))
-
-	# keep files matching the 'all' filter
-	if files and all is not None:
-		all = coerce_collection(all)
-		all = [f for f in all if f is not None]
-		for fil in all:
-			files = fnmatch.filter(files, fil)
-
-	# keep files matching the 'any' filter
-	if files and any is not None:
-		any = coerce_collection(any)
-		any = [f for f in any if f is not None]
-		if any:
-			includes = set()
-			for fil in any:
-				includes.update(fnmatch.filter(files, fil))
-			files = [f for f in includes]
-
-	# eliminate files matching the 'none' filter
-	if files and none is not None:
-		none = coerce_collection(none)
-		none = [f for f in none if f is not None]
-		if none:
-			excludes = set()
-			for fil in none:
-				excludes.update(fnmatch.filter(files, fil))
-			files = [f for f in files if f not in excludes]
-
-	files = [Path(root, f) for f in files] + child_files
+	all = _compile_file_name_filters(_coerce_file_name_filters(all))
+	any = _compile_file_name_filter_union(_coerce_file_name_filters(any))
+	none = _compile_file_name_filter_union(_coerce_file_name_filters(none))
+
+	if workers is None:
+		workers = min(32, (os.cpu_count() or 1) * 4)
+	if recursive and workers > 1:
+		return _walk_files_parallel(str(root), all, any, none, workers)
+	return _walk_files(str(root), all, any, none, recursive)
+
+
+
+def enumerate_files(root, all=None, any=None, none=None, recursive=False, sort=True, workers=1) -> List[pathlib.Path]:
+	'''
+	Collects all files in a directory matching some filename filters.
+
+	Recursive enumeration can read directories on multiple threads by setting `workers` to a thread count greater
+	than one, or to None to pick one automatically. This helps with large trees on fast or high-latency storage,
+	but can be slower on some platforms (e.g. macOS), so it is opt-in.
+	'''
+	files = [Path(entry.path) for entry in _enumerate_file_entries(root, all, any, none, recursive, workers)]
 	if sort:
 		files.sort()
 	return files
 
 
 
-def get_all_files(path, all=None, any=None, recursive=False, sort=True) -> List[pathlib.Path]:
-	return enumerate_files(path, all=all, any=any, recursive=recursive, sort=sort)
+def enumerate_files_with_stat(root,
+	all=None,
+	any=None,
+	none=None,
+	recursive=False,
+	sort=True,
+	workers=1) -> List[Tuple[pathlib.Path, os.stat_result]]:
+	'''
+	Same as enumerate_files(), but returns (path, os.stat_result) pairs.
+
+	Stat information is taken from the directory listing where the platform provides it (e.g. Windows), and is
+	otherwise fetched once per file during enumeration.
+	'''
+	files = [(Path(entry.path), entry.stat())
+		for entry in _enumerate_file_entries(root, all, any, none, recursive, workers)]
+	if sort:
+		files.sort(key=lambda f: f[0])
+	return files
+
+
+
+def get_all_files(path, all=None, any=None, recursive=False, sort=True, workers=1) -> List[pathlib.Path]:
+	'''
+	Collects all files in a directory matching some filename filters. Equivalent to enumerate_files().
+	'''
+	return enumerate_files(path, all=all, any=any, recursive=recursive, sort=sort, workers=workers)
 
 
 
@@ -300,45 +496,71 @@ def enumerate_directories(root, filter=None, recursive=False, sort=True) -> List
 	Collects all subdirectories in a directory.
 	'''
 	root = coerce_path(root)
-	if not root.exists():
+	st = _stat(root)
+	if st is None:
 		return []
-	if not root.is_dir():
+	if not stat.S_ISDIR(st.st_mode):
 		raise Exception(rf'{root} was not a directory')
 
 	subdirs = []
-	for p in root.iterdir():
-		if p.is_dir():
-			if filter is not None and not filter(p):
-				continue
-			subdirs.append(p)
-			if recursive:
-				subdirs = subdirs + enumerate_directories(p, filter=filter, recursive=True, sort=False)
+	dirs = collections.deque((str(root), ))
+	while dirs:
+		with os.scandir(dirs.popleft()) as it:
+			for entry in it:
+				if not entry.is_dir():
+					continue
+				p = Path(entry.path)
+				if filter is not None and not filter(p):
+					continue
+				subdirs.append(p)
+				if recursive:
+					dirs.append(entry.path)
 	if sort:
 		subdirs.sort()
 	return subdirs
 
 
 
+def _read_text(path, encoding) -> str:
+	# unbuffered since it's read in one go anyway; FileIO.readall() sizes its buffer from fstat()
+	with open(path, 'rb', buffering=0) as f:
+		text = f.read().decode(encoding)
+	# match text-mode universal newlines
+	if '\r' in text:
+		text = text.replace('\r\n', '\n').replace('\r', '\n')
+	return text
+
+
+
 def read_all_text_from_file(path, fallback_url=None, encoding='utf-8', logger=None) -> str:
 	'''
 	Reads all the text from a file, optionally downloading it if the file did not exist on disk or a read error occured.
 	'''
-	path = coerce_path(path)
+	path = _coerce_path_str(path)
 	if fallback_url is None:
-		assert_existing_file(path)
+		_assert_existing_file(path)
 	try:
 		_log(logger, rf'Reading {path}')
-		with open(path, 'r', encoding=encoding) as f:
-			text = f.read()
-		return text
+		return _read_text(path, encoding)
 	except:
 		if fallback_url is not None:
 			_log(logger, rf"Couldn't read file locally, downloading from {fallback_url}")
-			response = requests.get(fallback_url, timeout=1)
-			text = response.text
-			with open(path, 'w', encoding='utf-8', newline='\n') as f:
-				f.write(text)
-			return text
+			# stream to disk rather than holding the whole body in memory (more than once).
+			# it goes to a temp file first so a failed download never leaves a truncated file behind.
+			# (opened with 'xb' rather than using tempfile so the result gets the usual umask-derived permissions)
+			temp_path = rf'{path}.{uuid.uuid4().hex}.tmp'
+			try:
+				with _session().get(fallback_url, timeout=1, stream=True) as response:
+					response.raise_for_status()
+					with open(temp_path, 'xb') as f:
+						for chunk in response.iter_content(chunk_size=131072):
+							f.write(chunk)
+				os.replace(temp_path, path)
+			except:
+				if os.path.exists(temp_path):
+					os.unlink(temp_path)
+				raise
+			return _read_text(path, encoding)
 		else:
 			raise
 
@@ -346,27 +568,77 @@ def read_all_text_from_file(path, fallback_url=None, encoding='utf-8', logger=No
 
 def run_python_script(path, *args, cwd=None, check=True, **kwargs) -> subprocess.CompletedProcess:
 	'''
-	Invokes a python script as a subprocess.
+	Invokes a python script as a subprocess, using the same interpreter as the current process.
 	'''
-	path = coerce_path(path)
-	if not path.exists():
+	path = _coerce_path_str(path)
+	if _stat(path) is None:
 		raise Exception(rf'{path} was not an existing directory or file')
 
-	return subprocess.run([_state().python, str(path)] + [arg for arg in args],
-		check=check,
-		cwd=path.cwd() if cwd is None else cwd,
-		**kwargs)
+	# cwd=None already means 'inherit the current working directory'
+	return subprocess.run([_PYTHON, path, *args], check=check, cwd=cwd, **kwargs)
 
 
 
-def _do_hash(hasher, obj, *objs) -> str:
+_ASCII_SCALAR_TYPES = frozenset((int, float, bool))
+
+
+
+def _hash_input(obj):
 	assert obj is not None
-	append = lambda o: hasher.update(str(o).encode('utf-8'))
-	append(obj)
-	if objs:
-		for o in objs:
-			assert o is not None
-			append(o)
+	if isinstance(obj, (bytes, bytearray)):
+		return obj
+	if isinstance(obj, memoryview):
+		# hashers and b''.join() need a contiguous byte buffer; flattening the view keeps it zero-copy where possible
+		return obj.cast('B') if obj.c_contiguous else obj.tobytes()
+	if type(obj) in _ASCII_SCALAR_TYPES:  # exact types only; subclasses (e.g. enums) may have non-ascii str()
+		return str(obj).encode('ascii')
+	if type(obj) is not str:  # exact type only; str subclasses (e.g. str enums) may have a different str()
+		obj = str(obj)
+	return obj.encode('utf-8')
+
+
+
+def _hash_stream(hasher, f):
+	# file_digest() hashes objects with getbuffer() (e.g. BytesIO) from the start regardless of the read position,
+	# so those go through the readinto() loop to hash only the remaining contents (as on python < 3.11)
+	if hasattr(hashlib, 'file_digest') and not hasattr(f, 'getbuffer'):  # python 3.11+
+		hashlib.file_digest(f, lambda: hasher)
+		return
+	buf = bytearray(262144)
+	view = memoryview(buf)
+	while True:
+		size = f.readinto(buf)
+		if not size:
+			break
+		hasher.update(view[:size])
+
+
+
+def _do_hash(hasher, obj, *objs) -> str:
+	if not objs and not isinstance(obj, (io.RawIOBase, io.BufferedIOBase)):
+		hasher.update(_hash_input(obj))
+		return hasher.hexdigest()
+
+	# small inputs are batched so they cost one trip into the C implementation,
+	# large ones are passed through as-is to avoid copying them
+	chunks = []
+	for o in (obj, *objs):
+		if isinstance(o, (io.RawIOBase, io.BufferedIOBase)):
+			if chunks:
+				hasher.update(b''.join(chunks))
+				chunks = []
+			_hash_stream(hasher, o)
+			continue
+		o = _hash_input(o)
+		if (o.nbytes if isinstance(o, memoryview) else len(o)) < 65536:
+			chunks.append(o)
+			continue
+		if chunks:
+			hasher.update(b''.join(chunks))
+			chunks = []
+		hasher.update(o)
+	if chunks:
+		hasher.update(b''.join(chunks))
 	return hasher.hexdigest()
 
 
@@ -374,7 +646,12 @@ def _do_hash(hasher, obj, *objs) -> str:
 def sha1(obj, *objs) -> str:
 	'''
 	Returns an SHA-1 hash of one or more objects.
+
+	Bytes-like objects are hashed as-is, binary file objects have their remaining contents hashed, and everything
+	else is hashed as its UTF-8 encoded string representation.
 	'''
+	if not objs and type(obj) is str:  # fast path for the common case
+		return hashlib.sha1(obj.encode('utf-8')).hexdigest()
 	return _do_hash(hashlib.sha1(), obj, *objs)
 
 
@@ -382,17 +659,76 @@ def sha1(obj, *objs) -> str:
 def sha256(obj, *objs) -> str:
 	'''
 	Returns an SHA-256 hash of one or more objects.
+
+	Bytes-like objects are hashed as-is, binary file objects have their remaining contents hashed, and everything
+	else is hashed as its UTF-8 encoded string representation.
 	'''
+	if not objs and type(obj) is str:  # fast path for the common case
+		return hashlib.sha256(obj.encode('utf-8')).hexdigest()
 	return _do_hash(hashlib.sha256(), obj, *objs)
 
 
 
+def blake2b(obj, *objs) -> str:
+	'''
+	Returns a BLAKE2b hash of one or more objects.
+
+	Typically faster than sha1() and sha256() on 64-bit platforms.
+	'''
+	return _do_hash(hashlib.blake2b(), obj, *objs)
+
+
+
+def blake3(obj, *objs) -> str:
+	'''
+	Returns a BLAKE3 hash of one or more objects.
+
+	Much faster than sha1() and sha256() for larger inputs, so prefer it when a cryptographic-strength hash
+	isn't required (e.g. de-duplication). Requires the 'blake3' package.
+	'''
+	if _blake3 is None:
+		raise Exception(r"blake3() requires the 'blake3' package (pip install blake3)")
+	return _do_hash(_blake3(), obj, *objs)
+
+
+
+def _do_file_hash(hasher, path) -> str:
+	path = _coerce_path_str(path)
+	_assert_existing_file(path)
+	with open(path, 'rb') as f:
+		# large files are mapped so the hasher can consume the page cache directly
+		if os.fstat(f.fileno()).st_size >= 1048576:
+			with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+				hasher.update(mm)
+		else:
+			_hash_stream(hasher, f)
+	return hasher.hexdigest()
+
+
+
+def sha1_file(path) -> str:
+	'''
+	Returns an SHA-1 hash of the contents of a file.
+	'''
+	return _do_file_hash(hashlib.sha1(), path)
+
+
+
+def sha256_file(path) -> str:
+	'''
+	Returns an SHA-256 hash of the contents of a file.
+	'''
+	return _do_file_hash(hashlib.sha256(), path)
+
+
+
 def is_pow2(n) -> bool:
 	'''
 	Returns true if a positive integer is a power of two.
 	'''
-	n = int(n)
-	return n and (n & (n - 1) == 0)
+	if type(n) is not int:
+		n = int(n)
+	return n > 0 and not (n & (n - 1))
 
 
 
@@ -400,14 +736,28 @@ def next_pow2(n) -> int:
 	'''
 	Rounds an integer up to the next positive power of two.
 	'''
-	n = int(n)
-	if n <= 0:
+	if type(n) is not int:
+		n = int(n)
+	if n <= 1:
 		return 1
-	if n & (n - 1) == 0:
-		return n
-	while n & (n - 1) > 0:
-		n &= (n - 1)
-	return n << 1
+	return 1 << (n - 1).bit_length()
+
+
+
+@functools.lru_cache(maxsize=512)
+def _metavar_patterns(name: str):
+	name = re.escape(name)
+	return (
+		re.compile(rf'{{%[\t ]*{name}[\t ]*%}}'),  # {% name %}
+		re.compile(rf'[$%]\([\t ]*{name}[\t ]*\)')  # $( name ) and %( name )
+	)
+
+
+
+@functools.lru_cache(maxsize=64)
+def _metavars_pattern(names: tuple):
+	names = '|'.join([re.escape(n) for n in names])
+	return re.compile(rf'{{%[\t ]*({names})[\t ]*%}}|[$%]\([\t ]*({names})[\t ]*\)')
 
 
 
@@ -428,56 +778,56 @@ def replace_metavar(name, repl, text) -> str:
 
 	if not isinstance(name, str):
 		name = str(name)
-	name = re.escape(name.strip())
 	if not isinstance(repl, str):
 		repl = str(repl)
 	repl = repl.replace('\\','\\\\')
 	if not isinstance(text, str):
 		text = str(text)
 
-	#  {% name %}
-	text = re.sub(rf'{{%[\t ]*{name}[\t ]*%}}', repl, text)
+	for pattern in _metavar_patterns(name.strip()):
+		text = pattern.sub(repl, text)
+	return text
 
-	#  $( name ) and %( name )
-	text = re.sub(rf'[$%]\([\t ]*{name}[\t ]*\)', repl, text)
 
-	return text
 
+def replace_metavars(metavars: dict, text) -> str:
+	'''
+	Replaces multiple named meta variables in strings in a single pass.
+
+	See replace_metavar() for the supported formats.
+	'''
+	assert metavars is not None
+	assert text is not None
 
+	if not isinstance(text, str):
+		text = str(text)
+	repls = dict()
+	for name, repl in metavars.items():
+		assert name is not None
+		assert repl is not None
+		repls[str(name).strip()] = str(repl)
+	if not repls:
+		return text
 
-def _tabify_replace_range(s, start, length, replacement) -> str:
-	assert isinstance(s, str)
-	assert isinstance(replacement, str)
-	assert start >= 0
-	assert length > 0
-	assert start + length <= len(s)
-	return rf'{s[:start]}{replacement}{s[start+length:]}'
+	pattern = _metavars_pattern(tuple(repls.keys()))
+	return pattern.sub(lambda m: repls[m[1] if m[1] is not None else m[2]], text)
 
 
 
-def _tabify_count_preceeding_spaces(s, start, tab_width) -> str:
-	spaces = 0
-	for i in range(tab_width):
-		if s[start - i - 1] != ' ':
-			break
-		spaces += 1
-	return spaces
+def _tabify_line(line, tab_width) -> str:
+	text = line.lstrip(' \t')
+	indent = len(line[:len(line) - len(text)].expandtabs(tab_width))
+	return ('\t' * (indent // tab_width)) + (' ' * (indent % tab_width)) + text
 
 
 
 def tabify(s, tab_width=4) -> str:
 	'''
-	Replaces spaces with tabs.
+	Replaces leading spaces with tabs.
 	'''
 	if not isinstance(s, str):
 		s = str(s)
-	i = (len(s) - (len(s) % tab_width)) - tab_width
-	while i >= 0:
-		spaces = _tabify_count_preceeding_spaces(s, i + tab_width, tab_width)
-		if spaces > 1:
-			s = _tabify_replace_range(s, i + (tab_width - spaces), spaces, '\t')
-		i -= tab_width
-	return s
+	return '\n'.join([_tabify_line(line, tab_width) for line in s.split('\n')])
 
 
 
@@ -487,12 +837,7 @@ def untabify(s, tab_width=4) -> str:
 	'''
 	if not isinstance(s, str):
 		s = str(s)
-	i = s.find('\t')
-	while i != -1:
-		spaces = tab_width - (i % tab_width)
-		s = _tabify_replace_range(s, i, 1, ' ' * spaces)
-		i = s.find('\t', i + spaces - 1)
-	return s
+	return s.expandtabs(tab_width)
 
 
 
@@ -505,22 +850,11 @@ def reindent(s, indent='\t', tab_width=4) -> str:
 
 	if not isinstance(indent, str):
 		indent = str(indent)
-	indent = untabify(indent, tab_width=tab_width)
-
-	lstrip = 9999999999999999
-	s = [untabify(ss, tab_width) for ss in s.splitlines()]
-	for i in range(len(s)):
-		stripped = s[i].lstrip()
-		if not stripped:
-			s[i] = ''
-			continue
-		lstrip = min(len(s[i]) - len(stripped), lstrip)
-
-	for i in range(len(s)):
-		if s[i]:
-			s[i] = tabify(indent + s[i][lstrip:], tab_width=tab_width)
+	indent = indent.expandtabs(tab_width)
 
-	return '\n'.join(s)
+	lines = s.expandtabs(tab_width).splitlines()
+	lstrip = min([len(line) - len(line.lstrip()) for line in lines if line.strip()], default=0)
+	return '\n'.join([_tabify_line(indent + line[lstrip:], tab_width) if line.strip() else '' for line in lines])
 
 
 
@@ -4,8 +4,8 @@
 # See https://github.com/marzer/misk/blob/master/LICENSE.txt for the full license text.
 # SPDX-License-Identifier: MIT
 
-import time
 from datetime import timedelta
+from time import perf_counter_ns
 
 from . import functions as fn
 
@@ -25,7 +25,7 @@ class ScopeTimer(object):
 		self.__print_end = print_end
 
 	def __enter__(self):
-		self.__start = time.perf_counter_ns()
+		self.__start = perf_counter_ns()
 		if self.__print_start is not None and (not isinstance(self.__print_start, bool) or self.__print_start):
 			fn._log(self.__print_start, self.__description)
 
@@ -34,8 +34,5 @@ class ScopeTimer(object):
 			isinstance(self.__print_end, bool) and not self.__print_end
 		):
 			return
-		nanos = time.perf_counter_ns() - self.__start
-		micros = int(nanos / 1000)
-		nanos = int(nanos % 1000)
-		micros = float(micros) + float(nanos) / 1000.0
+		micros = (perf_counter_ns() - self.__start + 500) // 1000
 		fn._log(self.__print_end, rf'{self.__description} completed in {timedelta(microseconds=micros)}.')
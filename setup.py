@@ -46,4 +46,4 @@ with open(r'requirements.txt', encoding='utf-8') as file:
 	REQUIRES = file.read().strip().split()
 
 if __name__ == '__main__':
-	setup(**SETUP_ARGS, install_requires=REQUIRES)
+	setup(**SETUP_ARGS, install_requires=REQUIRES, extras_require={r'blake3': [r'blake3']})